@@ -1,11 +1,22 @@
 # llm.py
 
 import requests
+from requests.adapters import HTTPAdapter
 import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 
 DEFAULT_LLM = "llama3.2:latest"
 LLM_CONFIG_FILE = "llm_model.txt"
 
+# Shared session so concurrent ask_llm calls reuse keep-alive connections
+# instead of opening a new one per request
+_session = requests.Session()
+_session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=32))
+_session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=32))
+
 def get_model_name():
     """Reads the LLM model name from file or returns the default."""
     try:
@@ -22,7 +33,7 @@ def ask_llm(prompt):
     """Sends a prompt to the selected LLM model."""
     model = get_model_name()
     try:
-        response = requests.post("http://localhost:11434/api/generate", json={
+        response = _session.post("http://localhost:11434/api/generate", json={
             "model": model,
             "prompt": prompt,
             "stream": False
@@ -31,3 +42,75 @@ def ask_llm(prompt):
         return response.json().get("response", "")
     except Exception as e:
         return f"Error communicating with LLM: {e}"
+
+class LLMBatcher:
+    """Coalesces submitted items into batches that each cost one LLM call.
+
+    submit() returns a Future right away. A background thread collects items
+    until batch_size is reached or max_wait seconds pass, then runs
+    run_batch(items) on a pool of max_workers threads. run_batch must return
+    one result per item, in order. At most max_pending items may be in flight;
+    further submit() calls block until earlier ones resolve.
+    """
+
+    def __init__(self, run_batch, batch_size=8, max_wait=0.05, max_workers=4, max_pending=None):
+        self._run_batch = run_batch
+        self._batch_size = batch_size
+        self._max_wait = max_wait
+        self._queue = queue.Queue()
+        self._slots = threading.BoundedSemaphore(max_pending or batch_size * max_workers * 2)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._thread = threading.Thread(target=self._collect, daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def submit(self, item):
+        """Queue an item for the next batch and return a Future for its result."""
+        self._slots.acquire()
+        future = Future()
+        future.add_done_callback(lambda _: self._slots.release())
+        self._queue.put((item, future))
+        return future
+
+    def close(self):
+        """Flush pending items and wait for every batch to finish."""
+        self._queue.put(None)
+        self._thread.join()
+        self._executor.shutdown(wait=True)
+
+    def _collect(self):
+        closing = False
+        while not closing:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = [first]
+            deadline = time.monotonic() + self._max_wait
+            while len(batch) < self._batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    entry = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if entry is None:
+                    closing = True
+                    break
+                batch.append(entry)
+            self._executor.submit(self._dispatch, batch)
+
+    def _dispatch(self, batch):
+        try:
+            results = self._run_batch([item for item, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
@@ -1,21 +1,238 @@
 # rag_documentation_system.py
 
 import os
+import io
 import json
 import hashlib
+import mmap
+import sqlite3
 from pathlib import Path
-from typing import List, Dict, Tuple
+from collections.abc import MutableMapping
+from typing import List, Dict, Tuple, Optional
 import fnmatch
-from llm import ask_llm
+import re
+from llm import ask_llm, LLMBatcher
 import threading
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import queue
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 import time
+from functools import lru_cache
+from itertools import islice
+from collections import deque
+
+try:
+    import orjson  # Optional: faster cache (de)serialization
+except ImportError:
+    orjson = None
+
+def _json_dumps(data) -> str:
+    if orjson is not None:
+        return orjson.dumps(data).decode('utf-8')
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+
+def _json_loads(data):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+# Files above this size skip the LLM and get an extractive summary instead
+LARGE_FILE_SIZE = 262144
+
+# Import and definition lines used to build extractive summaries
+_SIGNATURE_RE = re.compile(r'^[ \t]*(import |from |class |def |function |export ).*$', re.MULTILINE)
+
+@lru_cache(maxsize=8192)
+def _hash_cached(path_str: str, mtime_ns: int) -> str:
+    """Hash a file's content; memoized per (path, mtime_ns) for the process lifetime."""
+    with open(path_str, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size < 65536:
+            return hashlib.blake2b(f.read()).hexdigest()
+        # Hash large files straight from the page cache
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return hashlib.blake2b(mm).hexdigest()
+
+def _stat_key(path) -> List[int]:
+    """Cheap change fingerprint: [size, mtime_ns], or None if the file cannot be stat'ed."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_size, st.st_mtime_ns]
+
+def _prep_file(path_str: str, root_str: str) -> Tuple:
+    """Read, hash and trim one file for analysis.
+
+    Kept at module level so it can run in a ProcessPoolExecutor. Returns
+    (relative_path, stat_key, file_hash, content, size, lines); content is
+    None if the file could not be read.
+    """
+    relative_path = os.path.relpath(path_str, root_str)
+    stat_key = _stat_key(path_str)
+    try:
+        file_hash = _hash_cached(path_str, stat_key[1])
+        size = stat_key[0]
+        # Only the head of the file is ever sent to the LLM, so read just that
+        with open(path_str, 'rb') as f:
+            head = f.read(4096)
+            if size <= LARGE_FILE_SIZE:
+                lines = head.count(b'\n') + f.read().count(b'\n') + 1
+            else:
+                # Extrapolate from the head rather than reading a huge file
+                lines = head.count(b'\n') * size // max(len(head), 1) + 1
+    except:
+        return relative_path, stat_key, "", None, 0, 0
+    
+    content = head.decode('utf-8', errors='ignore').replace('\r\n', '\n')
+    return relative_path, stat_key, file_hash, content[:4000], size, lines
+
+def _prep_chunk(path_strs: List[str], root_str: str) -> List[Tuple]:
+    """Run _prep_file over a chunk of paths, so each process task carries several files."""
+    return [_prep_file(path_str, root_str) for path_str in path_strs]
+
+def _prep_in_window(executor, path_strs: List[str], root_str: str, window: int,
+                    chunksize: int = 32):
+    """Yield _prep_file results in order with at most `window` chunks in flight.
+
+    Executor.map submits every file up front; this submits the next chunk only
+    as an earlier one is consumed, so a slow consumer also slows the readers
+    and memory stays bounded.
+    """
+    chunks = (path_strs[i:i + chunksize] for i in range(0, len(path_strs), chunksize))
+    in_flight = deque(executor.submit(_prep_chunk, chunk, root_str)
+                      for chunk in islice(chunks, window))
+    while in_flight:
+        preps = in_flight.popleft().result()
+        for chunk in islice(chunks, 1):
+            in_flight.append(executor.submit(_prep_chunk, chunk, root_str))
+        yield from preps
+
+def atomic_write(path: Path, data: str):
+    """Write text to a temp file beside path, then rename it into place.
+
+    Readers never see a half-written file, and a crash leaves the old one intact.
+    """
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+class AnalysisCache(MutableMapping):
+    """Dict-like view of the SQLite analysis cache.
+
+    Lookups are single-row SELECTs and every assignment is an immediate
+    upsert, so results survive a crash mid-run without rewriting the cache.
+    """
+    
+    def __init__(self, db_path: Path):
+        self._lock = threading.Lock()
+        try:
+            self._open(db_path)
+        except sqlite3.DatabaseError as e:
+            # An unreadable cache just means a cold run: start a fresh one
+            print(f"Error loading cache, starting a new one: {e}")
+            for suffix in ("", "-wal", "-shm"):
+                try:
+                    os.remove(f"{db_path}{suffix}")
+                except FileNotFoundError:
+                    pass
+            self._open(db_path)
+    
+    def _open(self, db_path: Path):
+        """Connect and create the schema; raises sqlite3.DatabaseError for a bad file."""
+        self._db = sqlite3.connect(str(db_path), isolation_level=None, check_same_thread=False)
+        try:
+            with self._lock:
+                self._db.execute("PRAGMA journal_mode=WAL")
+                self._db.execute("""CREATE TABLE IF NOT EXISTS cache (
+                    relpath TEXT PRIMARY KEY,
+                    hash TEXT,
+                    stat_size INTEGER,
+                    stat_mtime_ns INTEGER,
+                    analysis_json TEXT,
+                    content_preview TEXT
+                )""")
+                self._db.execute("CREATE INDEX IF NOT EXISTS cache_hash ON cache(hash)")
+        except sqlite3.DatabaseError:
+            # Release the handle so the bad file can be deleted (needed on Windows)
+            self._db.close()
+            raise
+    
+    @staticmethod
+    def _to_row(relpath: str, result: Dict) -> Tuple:
+        stat = result.get('stat') or [None, None]
+        rest = {k: v for k, v in result.items() if k not in ('hash', 'stat', 'content_preview')}
+        return (relpath, result.get('hash', ''), stat[0], stat[1],
+                _json_dumps(rest), result.get('content_preview', ''))
+    
+    @staticmethod
+    def _from_row(row: Tuple) -> Dict:
+        file_hash, stat_size, stat_mtime_ns, analysis_json, content_preview = row
+        result = _json_loads(analysis_json)
+        result['hash'] = file_hash
+        result['stat'] = [stat_size, stat_mtime_ns] if stat_size is not None else None
+        result['content_preview'] = content_preview
+        return result
+    
+    def __getitem__(self, relpath: str) -> Dict:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT hash, stat_size, stat_mtime_ns, analysis_json, content_preview "
+                "FROM cache WHERE relpath=?", (relpath,)).fetchone()
+        if row is None:
+            raise KeyError(relpath)
+        return self._from_row(row)
+    
+    def __setitem__(self, relpath: str, result: Dict):
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?, ?, ?)",
+                             self._to_row(relpath, result))
+    
+    def __delitem__(self, relpath: str):
+        with self._lock:
+            if self._db.execute("DELETE FROM cache WHERE relpath=?", (relpath,)).rowcount == 0:
+                raise KeyError(relpath)
+    
+    def __iter__(self):
+        with self._lock:
+            relpaths = [row[0] for row in self._db.execute("SELECT relpath FROM cache")]
+        return iter(relpaths)
+    
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+    
+    def find_by_hash(self, file_hash: str) -> Dict:
+        """Return any cached result for content with this hash, or None."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT hash, stat_size, stat_mtime_ns, analysis_json, content_preview "
+                "FROM cache WHERE hash=? LIMIT 1", (file_hash,)).fetchone()
+        return self._from_row(row) if row else None
+    
+    def close(self):
+        """Close the database connection, releasing the file for deletion."""
+        with self._lock:
+            self._db.close()
+
+    def update(self, results: Dict):
+        """Upsert many results in one transaction."""
+        rows = [self._to_row(relpath, result) for relpath, result in results.items()]
+        with self._lock:
+            self._db.execute("BEGIN")
+            try:
+                self._db.executemany("INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?, ?, ?)", rows)
+                self._db.execute("COMMIT")
+            except:
+                self._db.execute("ROLLBACK")
+                raise
 
 class CodebaseRAG:
     def __init__(self, root_path: str = "."):
         self.root_path = Path(root_path).resolve()
         self.cache_dir = self.root_path / ".rag_cache"
         self.cache_dir.mkdir(exist_ok=True)
+        self.cache = AnalysisCache(self.cache_dir / "cache.db")
         
         # File extensions to analyze
         self.code_extensions = {
@@ -24,6 +241,8 @@ class CodebaseRAG:
             '.html', '.css', '.scss', '.sass', '.vue', '.svelte', '.sql',
             '.sh', '.bash', '.ps1', '.yaml', '.yml', '.json', '.xml', '.toml'
         }
+        # Extensions without the dot, matched against name.rpartition('.') in the scan loop
+        self._ext_noprefix = frozenset(ext[1:] for ext in self.code_extensions)
         
         # Files to ignore
         self.ignore_patterns = [
@@ -33,6 +252,10 @@ class CodebaseRAG:
             '.rag_cache', 'venv', 'env', '.venv'
         ]
         
+        # Every pattern is tried against both the name and the full path, so
+        # one alternation of the translated globs covers them all
+        self._ignore_re = re.compile("|".join(fnmatch.translate(os.path.normcase(p)) for p in self.ignore_patterns))
+        
         # Documentation templates
         self.templates = {
             'readme': """# {project_name}
@@ -98,81 +321,136 @@ class CodebaseRAG:
 
     def should_ignore(self, path: Path) -> bool:
         """Check if a path should be ignored based on patterns."""
-        path_str = str(path)
-        for pattern in self.ignore_patterns:
-            if fnmatch.fnmatch(path.name, pattern) or fnmatch.fnmatch(path_str, pattern):
-                return True
-        return False
+        return self.is_ignored_name(path.name, str(path))
+
+    def is_ignored_name(self, name: str, path_str: str) -> bool:
+        """String-only variant of should_ignore for callers that have no Path object."""
+        # normcase mirrors fnmatch.fnmatch's case handling on Windows
+        return bool(self._ignore_re.match(os.path.normcase(name)) or
+                    self._ignore_re.match(os.path.normcase(path_str)))
 
     def get_file_hash(self, file_path: Path) -> str:
         """Generate hash for file content to check for changes."""
         try:
-            with open(file_path, 'rb') as f:
-                return hashlib.md5(f.read()).hexdigest()
+            return _hash_cached(str(file_path), file_path.stat().st_mtime_ns)
         except:
+            # Errors are not memoized, so a transient failure is retried next time
             return ""
 
     def load_cache(self) -> Dict:
         """Load cached analysis results."""
-        cache_file = self.cache_dir / "analysis_cache.json"
-        if cache_file.exists():
-            try:
-                with open(cache_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except:
-                return {}
-        return {}
+        # Caches written by older versions use MD5 hashes and no stat keys, so
+        # none of their entries could ever match; just remove the JSON file
+        try:
+            (self.cache_dir / "analysis_cache.json").unlink()
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"Error removing legacy cache: {e}")
+        return self.cache
+
+    def close(self):
+        """Close the analysis cache; call once the system is no longer needed."""
+        self.cache.close()
 
     def save_cache(self, cache_data: Dict):
         """Save analysis results to cache."""
-        cache_file = self.cache_dir / "analysis_cache.json"
         try:
-            with open(cache_file, 'w', encoding='utf-8') as f:
-                json.dump(cache_data, f, indent=2, ensure_ascii=False)
+            self.cache.update({k: v for k, v in cache_data.items() if 'error' not in v})
         except Exception as e:
             print(f"Error saving cache: {e}")
 
-    def scan_codebase(self) -> List[Path]:
-        """Scan codebase and return list of relevant files."""
-        files = []
+    def _scan_dir(self, dir_path: str) -> Tuple[List[str], List[str]]:
+        """List one directory, returning (code file paths, subdirectories to descend into)."""
+        files, subdirs = [], []
+        try:
+            it = os.scandir(dir_path)
+        except OSError:
+            return files, subdirs
         
-        for root, dirs, filenames in os.walk(self.root_path):
-            # Filter out ignored directories
-            dirs[:] = [d for d in dirs if not self.should_ignore(Path(root) / d)]
-            
-            for filename in filenames:
-                file_path = Path(root) / filename
-                
-                if self.should_ignore(file_path):
-                    continue
+        # Like os.walk, an error partway through a listing keeps what was read so far
+        try:
+            with it:
+                for entry in it:
+                    if self.is_ignored_name(entry.name, entry.path):
+                        continue
+                    
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                        continue
                     
-                if file_path.suffix.lower() in self.code_extensions:
-                    files.append(file_path)
+                    # An empty stem means no dot or a leading-dot name, which has no suffix
+                    stem, _, ext = entry.name.rpartition('.')
+                    if stem and ext.lower() in self._ext_noprefix and entry.is_file():
+                        files.append(entry.path)
+        except OSError:
+            pass
         
-        return files
+        return files, subdirs
 
-    def analyze_file(self, file_path: Path, cache: Dict) -> Dict:
-        """Analyze a single file and extract relevant information."""
-        relative_path = str(file_path.relative_to(self.root_path))
-        file_hash = self.get_file_hash(file_path)
+    def scan_codebase(self, scan_workers: int = None) -> List[Path]:
+        """Scan codebase and return list of relevant files."""
+        if scan_workers is None:
+            scan_workers = min(32, (os.cpu_count() or 1) * 4)
         
-        # Check cache
-        if relative_path in cache and cache[relative_path].get('hash') == file_hash:
-            return cache[relative_path]
+        pending = queue.Queue()
+        pending.put(str(self.root_path))
+        files = []
+        files_lock = threading.Lock()
         
-        try:
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
-        except:
-            return {'error': 'Could not read file', 'hash': file_hash}
+        def worker():
+            while True:
+                dir_path = pending.get()
+                if dir_path is None:
+                    return
+                try:
+                    found, subdirs = self._scan_dir(dir_path)
+                    # Queue subdirectories before marking this one done so
+                    # pending.join() cannot return while work remains
+                    for subdir in subdirs:
+                        pending.put(subdir)
+                    if found:
+                        with files_lock:
+                            files.extend(found)
+                except Exception as e:
+                    # A dead worker would leave pending.join() waiting forever
+                    print(f"Error scanning {dir_path}: {e}")
+                finally:
+                    pending.task_done()
         
-        # Prepare prompt for LLM analysis
-        prompt = f"""Analyze this code file and provide a structured summary:
+        with ThreadPoolExecutor(max_workers=scan_workers) as executor:
+            for _ in range(scan_workers):
+                executor.submit(worker)
+            pending.join()
+            for _ in range(scan_workers):
+                pending.put(None)
+        
+        return [Path(p) for p in sorted(files)]
+
+    def check_cache(self, file_path: Path, relative_path: str, cache: Dict) -> Tuple[Dict, List[int], str]:
+        """Look up a file in the cache, hashing its content only if its stat key changed.
+
+        Returns (cached_result, stat_key, file_hash); cached_result is None on a miss.
+        """
+        stat_key = _stat_key(file_path)
+        cached = cache.get(relative_path)
+        if cached and stat_key and cached.get('stat') == stat_key:
+            return cached, stat_key, cached.get('hash', '')
+        
+        # Stat key differs (or is missing) - fall back to comparing content hashes
+        file_hash = self.get_file_hash(file_path)
+        if cached and cached.get('hash') == file_hash:
+            return dict(cached, stat=stat_key), stat_key, file_hash
+        return None, stat_key, file_hash
+
+    def _file_prompt(self, relative_path: str, content: str) -> str:
+        """Build the single-file analysis prompt."""
+        return f"""Analyze this code file and provide a structured summary:
 
 File: {relative_path}
 Content:
 ```
-{content[:4000]}  # Limit content to avoid token limits
+{content}
 ```
 
 Please provide:
@@ -184,59 +462,271 @@ Please provide:
 
 Format as JSON with keys: description, key_components, dependencies, purpose, notes"""
 
+    def analyze_file(self, file_path: Path, cache: Dict) -> Dict:
+        """Analyze a single file and extract relevant information."""
+        relative_path = str(file_path.relative_to(self.root_path))
+        
+        # Check cache
+        cached, stat_key, file_hash = self.check_cache(file_path, relative_path, cache)
+        if cached is not None:
+            return cached
+        
+        prep = _prep_file(str(file_path), str(self.root_path))
+        result = self._result_without_llm(prep)
+        if result is not None:
+            return result
+        
+        # Prepare prompt for LLM analysis
+        prompt = self._file_prompt(relative_path, prep[3])
+
         print(f"Analyzing {relative_path}...")
         llm_response = ask_llm(prompt)
         
-        result = {
+        return self._build_result(prep, llm_response)
+
+    def _result_without_llm(self, prep: Tuple) -> Dict:
+        """Result for a prepared file that needs no LLM call, or None if it does.
+
+        Unreadable files get an error entry and large files an extractive
+        summary; every analysis path classifies prepared files through here.
+        """
+        if prep[3] is None:
+            return {'error': 'Could not read file', 'hash': prep[2]}
+        if prep[4] > LARGE_FILE_SIZE:
+            return self._extractive_summary(prep)
+        return None
+
+    def _build_result(self, prep: Tuple, analysis: str) -> Dict:
+        """Assemble the cached result dict for a prepared file and its analysis."""
+        relative_path, stat_key, file_hash, content, size, lines = prep
+        return {
+            'stat': stat_key,
             'hash': file_hash,
             'path': relative_path,
-            'size': len(content),
-            'lines': len(content.split('\n')),
-            'analysis': llm_response,
-            'content_preview': content[:500]
+            'size': size,
+            'lines': lines,
+            'analysis': analysis,
+            'content_preview': content[:500],
+            'has_api_keyword': self.has_api_keyword(relative_path, analysis),
+            'analysis_head': analysis[:300]
         }
+
+    def _extractive_summary(self, prep: Tuple) -> Dict:
+        """Summarize a large file from its imports and signatures, without an LLM call."""
+        try:
+            with open(self.root_path / prep[0], 'r', encoding='utf-8', errors='ignore') as f:
+                text = f.read(16384)
+        except:
+            text = prep[3]
         
-        return result
+        dependencies, key_components = [], []
+        for match in _SIGNATURE_RE.finditer(text):
+            line = match.group(0).strip()
+            if match.group(1) in ('import ', 'from '):
+                dependencies.append(line)
+            else:
+                key_components.append(line)
+        
+        analysis = json.dumps({
+            'description': f"Large file ({prep[4]} bytes) summarized without LLM analysis",
+            'key_components': key_components,
+            'dependencies': dependencies,
+            'purpose': "",
+            'notes': "Extracted from import and definition lines in the first 16 KB"
+        }, indent=2, ensure_ascii=False)
+        return self._build_result(prep, analysis)
+
+    def _share_result(self, result: Dict, prep: Tuple) -> Dict:
+        """Copy another file's result for a duplicate with identical content."""
+        return dict(result, path=prep[0], stat=prep[1],
+                    has_api_keyword=self.has_api_keyword(prep[0], result['analysis']))
+
+    def has_api_keyword(self, relative_path: str, analysis: str) -> bool:
+        """Whether a file should feed the API documentation pass."""
+        return 'api' in relative_path.lower() or 'endpoint' in analysis.lower()
+
+    def _extract_json(self, response: str, open_char: str, close_char: str):
+        """Parse the outermost JSON array/object in an LLM response, or return None."""
+        start = response.find(open_char)
+        end = response.rfind(close_char)
+        if start == -1 or end <= start:
+            return None
+        try:
+            return json.loads(response[start:end + 1])
+        except ValueError:
+            return None
+
+    def _parse_batch_response(self, response: str, expected: int, item_type: type = dict):
+        """Extract a JSON array of `expected` items of item_type from an LLM response."""
+        items = self._extract_json(response, '[', ']')
+        if not isinstance(items, list) or len(items) != expected:
+            return None
+        if not all(isinstance(item, item_type) for item in items):
+            return None
+        return items
+
+    def _analyze_prepped(self, pending: List[Tuple], batch_size: int) -> Dict:
+        """Run LLM analysis over prepared files, batch_size files per call."""
+        results = {}
+        start = 0
+        while start < len(pending):
+            chunk = pending[start:start + batch_size]
+
+            if len(chunk) == 1:
+                relative_path, content = chunk[0][0], chunk[0][3]
+                print(f"Analyzing {relative_path}...")
+                analyses = [ask_llm(self._file_prompt(relative_path, content))]
+            else:
+                # Keep each file short so the whole batch fits the context window
+                sections = "\n".join(
+                    f"===FILE {i}: {prep[0]}===\n{prep[3][:1500]}"
+                    for i, prep in enumerate(chunk, 1)
+                )
+                prompt = f"""Analyze these files and return a JSON array with one object per file, in the same order. Use keys description, key_components, dependencies, purpose, notes.
+
+{sections}"""
+
+                print(f"Analyzing {', '.join(prep[0] for prep in chunk)}...")
+                items = self._parse_batch_response(ask_llm(prompt), len(chunk))
+                if items is None:
+                    # Malformed array - retry with smaller batches
+                    batch_size = max(1, len(chunk) // 2)
+                    continue
+                analyses = [json.dumps(item, indent=2, ensure_ascii=False) for item in items]
+
+            for prep, analysis in zip(chunk, analyses):
+                results[prep[0]] = self._build_result(prep, analysis)
+            start += len(chunk)
+
+        return results
+
+    def analyze_files_batch(self, file_paths: List[Path], cache: Dict,
+                            batch_size: int = 8) -> Dict:
+        """Analyze several files with a single LLM call per batch."""
+        results = {}
+        pending = []
+
+        for file_path in file_paths:
+            relative_path = str(file_path.relative_to(self.root_path))
+
+            # Check cache
+            cached, _, file_hash = self.check_cache(file_path, relative_path, cache)
+            if cached is not None:
+                results[relative_path] = cached
+                continue
+
+            prep = _prep_file(str(file_path), str(self.root_path))
+            result = self._result_without_llm(prep)
+            if result is not None:
+                results[relative_path] = result
+            else:
+                pending.append(prep)
 
-    def analyze_codebase_parallel(self, max_workers: int = 4) -> Dict:
+        results.update(self._analyze_prepped(pending, batch_size))
+        return results
+
+    def analyze_codebase_parallel(self, max_workers: int = 4, batch_size: int = 8,
+                                  scan_workers: int = None) -> Dict:
         """Analyze entire codebase using parallel processing."""
-        files = self.scan_codebase()
+        files = self.scan_codebase(scan_workers)
         cache = self.load_cache()
         results = {}
+        results_lock = threading.Lock()
+        duplicates = {}
         
         print(f"Found {len(files)} files to analyze...")
         
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            # Submit all tasks
-            future_to_file = {
-                executor.submit(self.analyze_file, file_path, cache): file_path
-                for file_path in files
-            }
-            
-            # Collect results as they complete
-            for future in as_completed(future_to_file):
-                file_path = future_to_file[future]
-                try:
-                    result = future.result()
-                    relative_path = str(file_path.relative_to(self.root_path))
-                    results[relative_path] = result
-                    print(f"✓ Completed: {relative_path}")
-                except Exception as e:
-                    print(f"✗ Error analyzing {file_path}: {e}")
+        def record(new_results: Dict):
+            self.save_cache(new_results)
+            with results_lock:
+                results.update(new_results)
+        
+        def run_batch(preps: List[Tuple]) -> List[Dict]:
+            batch_results = self._analyze_prepped(preps, batch_size)
+            record(batch_results)
+            for relative_path in batch_results:
+                print(f"✓ Completed: {relative_path}")
+            return [batch_results.get(prep[0]) for prep in preps]
+        
+        # Reuse entries whose stat key is unchanged without reading them
+        to_prep = []
+        for file_path in files:
+            relative_path = str(file_path.relative_to(self.root_path))
+            cached = cache.get(relative_path)
+            if cached and cached.get('stat') == _stat_key(file_path):
+                results[relative_path] = cached
+            else:
+                to_prep.append(str(file_path))
+        
+        # Files are read, hashed and trimmed in worker processes, outside this
+        # process's GIL, and handed to the batcher as they arrive. The batcher
+        # groups them into LLM calls while preparation continues, and blocks
+        # submit() once a few batches are waiting; preparation in turn keeps
+        # only a couple of chunks per process ahead of the batcher.
+        futures = {}
+        if to_prep:
+            queued = set()
+            prep_workers = os.cpu_count() or 1
+            if os.name == 'nt':
+                # ProcessPoolExecutor rejects more than 61 workers on Windows
+                prep_workers = min(prep_workers, 61)
+            with LLMBatcher(run_batch, batch_size=batch_size, max_workers=max_workers) as batcher, \
+                    ProcessPoolExecutor(prep_workers) as executor:
+                for prep in _prep_in_window(executor, to_prep, str(self.root_path),
+                                            window=2 * prep_workers):
+                    relative_path, stat_key, file_hash = prep[:3]
+                    cached = cache.get(relative_path)
+                    if cached and cached.get('hash') == file_hash:
+                        record({relative_path: dict(cached, stat=stat_key)})
+                        continue
+                    result = self._result_without_llm(prep)
+                    if result is not None:
+                        # save_cache leaves error entries out of the cache
+                        record({relative_path: result})
+                    elif file_hash in queued:
+                        # Identical content is already on its way to the LLM
+                        duplicates.setdefault(file_hash, []).append(prep)
+                    else:
+                        twin = self.cache.find_by_hash(file_hash)
+                        if twin:
+                            record({relative_path: self._share_result(twin, prep)})
+                            continue
+                        queued.add(file_hash)
+                        futures[relative_path] = batcher.submit(prep)
         
-        # Save updated cache
-        self.save_cache(results)
+        for relative_path, future in futures.items():
+            if future.exception() is not None:
+                print(f"✗ Error analyzing {relative_path}: {future.exception()}")
+        
+        # Identical files share the analysis of the copy that was sent to the LLM
+        by_hash = {result['hash']: result for result in results.values() if 'analysis' in result}
+        for file_hash, group in duplicates.items():
+            if file_hash in by_hash:
+                record({prep[0]: self._share_result(by_hash[file_hash], prep) for prep in group})
+        
+        # Drop entries for files that no longer exist
+        for relative_path in set(cache) - set(results):
+            del cache[relative_path]
         return results
 
+    def _summaries_text(self, analysis_results: Dict, limit: int = 20) -> str:
+        """Join the first `limit` file summaries for use in a prompt."""
+        out = io.StringIO()
+        count = 0
+        for path, result in analysis_results.items():
+            if count == limit:  # Limit to avoid token limits
+                break
+            if 'analysis' in result:
+                if count:
+                    out.write("\n\n")
+                out.write(f"File: {path}\nAnalysis: {result.get('analysis_head') or result['analysis'][:300]}...")
+                count += 1
+        return out.getvalue()
+
     def generate_project_overview(self, analysis_results: Dict) -> str:
         """Generate high-level project overview."""
         # Prepare summary of all files for LLM
-        file_summaries = []
-        for path, result in analysis_results.items():
-            if 'analysis' in result:
-                file_summaries.append(f"File: {path}\nAnalysis: {result['analysis'][:300]}...")
-        
-        summaries_text = "\n\n".join(file_summaries[:20])  # Limit to avoid token limits
+        summaries_text = self._summaries_text(analysis_results)
         
         prompt = f"""Based on the following code analysis, generate a comprehensive project overview:
 
@@ -253,38 +743,115 @@ Format as a well-structured markdown overview."""
         
         return ask_llm(prompt)
 
-    def generate_readme(self, analysis_results: Dict) -> str:
-        """Generate comprehensive README.md file."""
-        project_name = self.root_path.name.replace('_', ' ').replace('-', ' ').title()
+    def generate_readme_sections(self, analysis_results: Dict) -> Dict:
+        """Generate the overview, structure and installation README sections in one LLM call."""
+        summaries_text = self._summaries_text(analysis_results)
+        setup_files = [k for k in analysis_results.keys()
+                       if any(ext in k for ext in ['.py', '.js', '.json', '.yaml', '.requirements'])][:10]
         
-        # Generate different sections
-        overview = self.generate_project_overview(analysis_results)
+        prompt = f"""Based on the following code analysis, write sections of a project README:
+
+{summaries_text}
+
+Files: {', '.join(list(analysis_results.keys())[:30])}
+Project files suggest: {', '.join(setup_files)}
+
+Return a JSON object with these keys, each value a markdown string:
+- overview: project name and main purpose, architecture overview, key technologies and frameworks used, main components and their relationships
+- structure: a clean project structure tree showing the directory structure in a clear, organized way
+- installation: clear, step-by-step installation and setup instructions"""
         
-        # Generate project structure
+        sections = self._extract_json(ask_llm(prompt), '{', '}')
+        keys = ('overview', 'structure', 'installation')
+        if isinstance(sections, dict) and all(isinstance(sections.get(k), str) for k in keys):
+            return {k: sections[k] for k in keys}
+        
+        # Malformed response - fall back to one call per section
         structure_prompt = f"""Based on these files, create a clean project structure tree:
 
 Files: {', '.join(list(analysis_results.keys())[:30])}
 
 Show the directory structure in a clear, organized way."""
         
-        structure = ask_llm(structure_prompt)
-        
-        # Generate installation/setup instructions
         setup_prompt = f"""Based on the project analysis, suggest installation and setup instructions:
 
-Project files suggest: {', '.join([k for k in analysis_results.keys() if any(ext in k for ext in ['.py', '.js', '.json', '.yaml', '.requirements'])][:10])}
+Project files suggest: {', '.join(setup_files)}
 
 Provide clear, step-by-step setup instructions."""
         
-        installation = ask_llm(setup_prompt)
+        return {
+            'overview': self.generate_project_overview(analysis_results),
+            'structure': ask_llm(structure_prompt),
+            'installation': ask_llm(setup_prompt)
+        }
+
+    @staticmethod
+    def _component_name(relative_path: str) -> str:
+        """Doc name for a file: its relative path without the suffix, dot-separated.
+
+        Using the whole path keeps same-stem files such as a/__init__.py and
+        b/__init__.py from sharing one doc and one hash sidecar.
+        """
+        return '.'.join(Path(relative_path).with_suffix('').parts)
+
+    def _doc_hash_file(self, name: str) -> Path:
+        return self.root_path / "docs" / ".hashes" / f"{name}.hash"
+
+    def _doc_is_current(self, doc_file: Path, name: str, doc_hash: str) -> bool:
+        """True if doc_file exists and was generated from inputs with this hash."""
+        try:
+            return doc_file.exists() and self._doc_hash_file(name).read_text() == doc_hash
+        except OSError:
+            return False
+
+    def _mark_doc_current(self, name: str, doc_hash: str):
+        hash_file = self._doc_hash_file(name)
+        try:
+            hash_file.parent.mkdir(parents=True, exist_ok=True)
+            atomic_write(hash_file, doc_hash)
+        except OSError as e:
+            print(f"Error saving {hash_file}: {e}")
+
+    def _project_name(self) -> str:
+        return self.root_path.name.replace('_', ' ').replace('-', ' ').title()
+
+    def _readme_hash(self, analysis_results: Dict) -> str:
+        """Digest of everything the README prompts are built from.
+
+        Covers the file list and each file's summary head, so a re-analysis
+        that changes a summary regenerates the README even if no file content
+        changed. Sorted, since results arrive in completion order.
+        """
+        return hashlib.blake2b("\n".join(
+            [self._project_name()] + sorted(
+                f"{path}\0{result.get('analysis_head') or result.get('analysis', '')[:300]}"
+                for path, result in analysis_results.items())
+        ).encode('utf-8')).hexdigest()[:16]
+
+    def generate_readme(self, analysis_results: Dict) -> Optional[str]:
+        """Generate comprehensive README.md file.
+
+        Returns None if the existing README.md was generated from the same inputs.
+        """
+        project_name = self._project_name()
+        
+        # Reuse the existing README if none of its inputs changed
+        readme_file = self.root_path / "README.md"
+        readme_hash = self._readme_hash(analysis_results)
+        if self._doc_is_current(readme_file, "README.md", readme_hash):
+            print(f"Up to date: {readme_file}")
+            return None
+        
+        # Generate different sections
+        sections = self.generate_readme_sections(analysis_results)
         
         # Fill template
         readme_content = self.templates['readme'].format(
             project_name=project_name,
-            overview=overview,
-            structure=structure,
+            overview=sections['overview'],
+            structure=sections['structure'],
             components="Generated from code analysis",
-            installation=installation,
+            installation=sections['installation'],
             usage="See individual component documentation",
             api_docs="See API documentation file",
             dependencies="Extracted from project files",
@@ -294,16 +861,40 @@ Provide clear, step-by-step setup instructions."""
         
         return readme_content
 
-    def generate_component_docs(self, analysis_results: Dict):
+    def write_readme(self, readme_content: str, analysis_results: Dict) -> Path:
+        """Write README.md, then record the inputs it was generated from.
+
+        The hash is only stored once the write has succeeded, so a failed
+        write never makes an older README look up to date.
+        """
+        readme_file = self.root_path / "README.md"
+        atomic_write(readme_file, readme_content)
+        self._mark_doc_current("README.md", self._readme_hash(analysis_results))
+        return readme_file
+
+    def generate_component_docs(self, analysis_results: Dict, batch_size: int = 8):
         """Generate documentation for individual components."""
         docs_dir = self.root_path / "docs"
         docs_dir.mkdir(exist_ok=True)
         
+        # Skip components whose doc was generated from the same analysis
+        components = []
         for file_path, analysis in analysis_results.items():
             if 'analysis' in analysis and analysis['analysis']:
-                # Generate detailed documentation for each component
-                component_name = Path(file_path).stem
-                
+                component_name = self._component_name(file_path)
+                doc_hash = hashlib.blake2b(
+                    (analysis['analysis'] + analysis.get('content_preview', '')).encode('utf-8')
+                ).hexdigest()[:16]
+                if self._doc_is_current(docs_dir / f"{component_name}.md", component_name, doc_hash):
+                    continue
+                components.append((file_path, analysis, component_name, doc_hash))
+        
+        start = 0
+        while start < len(components):
+            chunk = components[start:start + batch_size]
+            
+            if len(chunk) == 1:
+                file_path, analysis = chunk[0][:2]
                 doc_prompt = f"""Create detailed documentation for this code component:
 
 File: {file_path}
@@ -318,17 +909,41 @@ Generate comprehensive documentation including:
 5. Configuration options if any
 
 Format as clean markdown."""
-                
-                doc_content = ask_llm(doc_prompt)
-                
+                doc_contents = [ask_llm(doc_prompt)]
+            else:
+                # Document several components per call, sharing the instructions
+                sections = "\n".join(
+                    f"===COMPONENT {i}: {file_path}===\nAnalysis: {analysis['analysis']}\n"
+                    f"Code preview: {analysis.get('content_preview', '')}"
+                    for i, (file_path, analysis, _, _) in enumerate(chunk, 1)
+                )
+                doc_prompt = f"""Create detailed documentation for each of these code components and return a JSON array with one markdown string per component, in the same order.
+
+Each document should include:
+1. Purpose and functionality
+2. Key methods/functions with descriptions
+3. Usage examples where applicable
+4. Dependencies and relationships
+5. Configuration options if any
+
+{sections}"""
+                doc_contents = self._parse_batch_response(ask_llm(doc_prompt), len(chunk), str)
+                if doc_contents is None:
+                    # Malformed array - retry with smaller batches
+                    batch_size = max(1, len(chunk) // 2)
+                    continue
+            
+            for (_, _, component_name, doc_hash), doc_content in zip(chunk, doc_contents):
                 # Save component documentation
                 doc_file = docs_dir / f"{component_name}.md"
                 try:
-                    with open(doc_file, 'w', encoding='utf-8') as f:
-                        f.write(doc_content)
+                    atomic_write(doc_file, doc_content)
                     print(f"Generated documentation: {doc_file}")
                 except Exception as e:
                     print(f"Error saving {doc_file}: {e}")
+                    continue
+                self._mark_doc_current(component_name, doc_hash)
+            start += len(chunk)
 
     def generate_all_documentation(self):
         """Main method to generate all documentation."""
@@ -342,14 +957,13 @@ Format as clean markdown."""
         # Step 2: Generate README
         print("\n📝 Generating README.md...")
         readme_content = self.generate_readme(analysis_results)
-        readme_file = self.root_path / "README.md"
         
-        try:
-            with open(readme_file, 'w', encoding='utf-8') as f:
-                f.write(readme_content)
-            print(f"✅ Generated: {readme_file}")
-        except Exception as e:
-            print(f"❌ Error saving README: {e}")
+        if readme_content is not None:
+            try:
+                readme_file = self.write_readme(readme_content, analysis_results)
+                print(f"✅ Generated: {readme_file}")
+            except Exception as e:
+                print(f"❌ Error saving README: {e}")
         
         # Step 3: Generate component documentation
         print("\n📚 Generating component documentation...")
@@ -357,13 +971,12 @@ Format as clean markdown."""
         
         # Step 4: Generate API documentation if applicable
         print("\n🔧 Generating API documentation...")
-        api_files = [k for k, v in analysis_results.items()
-                    if 'api' in k.lower() or 'endpoint' in v.get('analysis', '').lower()]
+        api_files = [k for k, v in analysis_results.items() if v.get('has_api_keyword')]
         
         if api_files:
             api_prompt = f"""Generate API documentation based on these files:
 
-{chr(10).join([f"File: {f}, Analysis: {analysis_results[f].get('analysis', '')[:200]}..." for f in api_files[:5]])}
+{chr(10).join([f"File: {f}, Analysis: {analysis_results[f].get('analysis_head', '')[:200]}..." for f in api_files[:5]])}
 
 Create comprehensive API documentation with endpoints, parameters, and examples."""
             
@@ -371,8 +984,7 @@ Create comprehensive API documentation with endpoints, parameters, and examples.
             api_file = self.root_path / "API_DOCUMENTATION.md"
             
             try:
-                with open(api_file, 'w', encoding='utf-8') as f:
-                    f.write(api_docs)
+                atomic_write(api_file, api_docs)
                 print(f"✅ Generated: {api_file}")
             except Exception as e:
                 print(f"❌ Error saving API docs: {e}")
@@ -396,7 +1008,10 @@ def main():
     args = parser.parse_args()
     
     rag_system = CodebaseRAG(args.path)
-    rag_system.generate_all_documentation()
+    try:
+        rag_system.generate_all_documentation()
+    finally:
+        rag_system.close()
 
 if __name__ == "__main__":
     main()
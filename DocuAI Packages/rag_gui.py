@@ -1,24 +1,167 @@
 # rag_gui.py
 
+import contextlib
+import io
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext
 import threading
 import queue
+import collections
 import os
+import platform
+import shutil
+import subprocess
 import sys
+import time
 from pathlib import Path
 import json
 from datetime import datetime
+from enum import IntEnum
+from itertools import groupby
+from operator import itemgetter
 
 # Import your RAG system
 try:
-    from rag_documentation_system import CodebaseRAG
+    from rag_documentation_system import CodebaseRAG, atomic_write
     from llm import get_model_name, ask_llm
 except ImportError:
     messagebox.showerror("Import Error", "Please ensure rag_documentation_system.py and llm.py are in the same directory")
     sys.exit(1)
 
+# Quick file count used by scan_project_files
+CODE_EXTS = ('.py', '.js', '.ts', '.jsx', '.tsx', '.java', '.cpp', '.c', '.h')
+IGNORED_DIRS = frozenset({'__pycache__', '.git', '.vscode', '.idea', 'node_modules',
+                          '.rag_cache', 'venv', 'env', '.venv'})
+
+_PLATFORM = platform.system()
+
+if _PLATFORM == "Windows":
+    import ctypes
+    from ctypes import wintypes
+    
+    _kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+    _kernel32.FindFirstFileExW.argtypes = [wintypes.LPCWSTR, ctypes.c_int, ctypes.c_void_p,
+                                          ctypes.c_int, ctypes.c_void_p, wintypes.DWORD]
+    _kernel32.FindFirstFileExW.restype = wintypes.HANDLE
+    _kernel32.FindNextFileW.argtypes = [wintypes.HANDLE, ctypes.POINTER(wintypes.WIN32_FIND_DATAW)]
+    _kernel32.FindNextFileW.restype = wintypes.BOOL
+    _kernel32.FindClose.argtypes = [wintypes.HANDLE]
+    _kernel32.FindClose.restype = wintypes.BOOL
+    
+    _FIND_EX_INFO_BASIC = 1
+    _FIND_EX_SEARCH_NAME_MATCH = 0
+    _FIND_FIRST_EX_LARGE_FETCH = 2
+    _FILE_ATTRIBUTE_DIRECTORY = 0x10
+    _FILE_ATTRIBUTE_REPARSE_POINT = 0x400
+    _ERROR_FILE_NOT_FOUND = 2
+    _INVALID_HANDLE_VALUE = ctypes.c_void_p(-1).value
+    
+    def _win_listdir(path):
+        """List (name, is_dir) pairs with FindFirstFileExW's large-fetch basic info mode."""
+        data = wintypes.WIN32_FIND_DATAW()
+        handle = _kernel32.FindFirstFileExW(os.path.join(path, "*"), _FIND_EX_INFO_BASIC,
+                                            ctypes.byref(data), _FIND_EX_SEARCH_NAME_MATCH,
+                                            None, _FIND_FIRST_EX_LARGE_FETCH)
+        if handle == _INVALID_HANDLE_VALUE:
+            error = ctypes.get_last_error()
+            if error == _ERROR_FILE_NOT_FOUND:
+                return []
+            raise ctypes.WinError(error)
+        
+        entries = []
+        try:
+            while True:
+                name = data.cFileName
+                if name not in (".", ".."):
+                    # Like is_dir(follow_symlinks=False): links and junctions are not descended into
+                    attrs = data.dwFileAttributes
+                    entries.append((name, bool(attrs & _FILE_ATTRIBUTE_DIRECTORY) and
+                                    not attrs & _FILE_ATTRIBUTE_REPARSE_POINT))
+                if not _kernel32.FindNextFileW(handle, ctypes.byref(data)):
+                    break
+        finally:
+            _kernel32.FindClose(handle)
+        return entries
+    
+    _listdir = _win_listdir
+else:
+    def _listdir(path):
+        """List (name, is_dir) pairs for a directory."""
+        with os.scandir(path) as it:
+            return [(entry.name, entry.is_dir(follow_symlinks=False)) for entry in it]
+
+def _walk(root):
+    """Yield code file paths below root, pruning IGNORED_DIRS."""
+    stack = [root]
+    while stack:
+        dir_path = stack.pop()
+        try:
+            entries = _listdir(dir_path)
+        except OSError:
+            continue
+        for name, is_dir in entries:
+            if is_dir:
+                if name not in IGNORED_DIRS:
+                    stack.append(os.path.join(dir_path, name))
+            elif name.lower().endswith(CODE_EXTS):
+                yield os.path.join(dir_path, name)
+
+def _fast_rmtree(path):
+    """Remove a directory tree, using DirEntry types instead of a stat per entry."""
+    with os.scandir(path) as it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                _fast_rmtree(entry.path)
+            else:
+                os.unlink(entry.path)
+    os.rmdir(path)
+
+class Lvl(IntEnum):
+    """Log levels; INFO is falsy so plain lines can skip tagging."""
+    INFO = 0
+    ERROR = 1
+    SUCCESS = 2
+    WARN = 3
+
+# Text widget tag for each level
+_TAG = {Lvl.INFO: "info", Lvl.ERROR: "error", Lvl.SUCCESS: "success", Lvl.WARN: "warn"}
+
+class _QueueWriter(io.TextIOBase):
+    """Text stream that forwards each complete line to the GUI log."""
+
+    def __init__(self, gui, level=Lvl.INFO):
+        self._gui = gui
+        self._level = level
+        self._partial = ""
+        self._lock = threading.Lock()
+
+    def writable(self):
+        return True
+
+    def write(self, s):
+        with self._lock:
+            *lines, self._partial = (self._partial + s).split("\n")
+        for line in lines:
+            if line:
+                self._gui.queue_log(line, self._level)
+        return len(s)
+
+    def flush(self):
+        """Forward any trailing text that has no newline yet."""
+        with self._lock:
+            line, self._partial = self._partial, ""
+        if line:
+            self._gui.queue_log(line, self._level)
+
 class RAGDocumentationGUI:
+    # Top-level files written by a generation run, and the per-component docs folder
+    COMMON_DOCS = frozenset({"README.md", "API_DOCUMENTATION.md"})
+    DOCS_SUBDIR = "docs"
+    
+    # The output log keeps at most MAX_LINES lines, dropping TRIM_CHUNK at a time
+    MAX_LINES = 5000
+    TRIM_CHUNK = 1000
+    
     def __init__(self):
         self.root = tk.Tk()
         self.root.title("RAG Documentation Generator")
@@ -31,19 +174,46 @@ class RAGDocumentationGUI:
         
         # Variables
         self.project_path = tk.StringVar(value=os.getcwd())
+        # Plain-string copy of the path, kept current by a write trace; also
+        # safe to read from the worker thread without a Tcl call
+        self._project_path_cached = self.project_path.get()
+        self.project_path.trace_add("write", self._on_path_change)
         self.current_model = tk.StringVar(value=get_model_name())
         self.max_workers = tk.IntVar(value=4)
         self.is_running = False
         self.rag_system = None
         
-        # Queue for thread communication
-        self.progress_queue = queue.Queue()
+        # Queue for thread communication; deque append/popleft are atomic,
+        # so no lock or condition variable is taken per message
+        self.progress_queue = collections.deque()
+        
+        # Worker log lines are buffered and sent to the queue in batches
+        self._log_buf = []
+        self._log_lock = threading.Lock()
+        self._log_last_flush = time.monotonic()
+        
+        # Set while a <<QueueUpdate>> event is on its way to the GUI thread
+        self._queue_event = threading.Event()
+        
+        # One long-lived worker thread runs every generation. It is a daemon
+        # thread so closing the window never waits on outstanding LLM calls
+        self._jobs = queue.SimpleQueue()
+        threading.Thread(target=self._job_loop, name="rag-gen", daemon=True).start()
+        
+        # Set by clear_log; the next drain empties the output log
+        self._pending_clear = False
+        
+        # Last progress value applied, so the finished handler need not read it back from Tcl
+        self._last_progress = 0
         
         # Setup GUI
         self.setup_gui()
         self.setup_menu()
         
-        # Start checking queue
+        # Worker threads wake the GUI thread through a virtual event
+        self.root.bind("<<QueueUpdate>>", lambda e: self._drain_queue())
+        
+        # Start the fallback queue check
         self.check_queue()
         
     def setup_menu(self):
@@ -143,6 +313,9 @@ class RAGDocumentationGUI:
         
         self.output_text = scrolledtext.ScrolledText(output_frame, height=15, wrap=tk.WORD)
         self.output_text.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        self.output_text.tag_config("error", foreground="red")
+        self.output_text.tag_config("success", foreground="green")
+        self.output_text.tag_config("warn", foreground="orange")
         
         # Progress bar
         self.progress_var = tk.DoubleVar()
@@ -181,55 +354,109 @@ class RAGDocumentationGUI:
         # Configure style for accent button
         self.style.configure("Accent.TButton", foreground="white", background="#0078d4")
         
-    def log_message(self, message, level="INFO"):
+    def log_message(self, message, level=Lvl.INFO):
         """Add message to output log."""
         timestamp = datetime.now().strftime("%H:%M:%S")
-        formatted_message = f"[{timestamp}] {level}: {message}\n"
+        formatted_message = f"[{timestamp}] {level.name}: {message}\n"
         
-        self.output_text.insert(tk.END, formatted_message)
+        # Color coding comes from the level's tag
+        self.output_text.insert(tk.END, formatted_message, _TAG[level])
         self.output_text.see(tk.END)
         
-        # Color coding
-        if level == "ERROR":
-            # Get the current position and apply red color
-            start = self.output_text.index(f"end-1c linestart")
-            end = self.output_text.index(f"end-1c lineend")
-            self.output_text.tag_add("error", start, end)
-            self.output_text.tag_config("error", foreground="red")
-        elif level == "SUCCESS":
-            start = self.output_text.index(f"end-1c linestart")
-            end = self.output_text.index(f"end-1c lineend")
-            self.output_text.tag_add("success", start, end)
-            self.output_text.tag_config("success", foreground="green")
-        
         self.root.update_idletasks()
         
+    def log_messages(self, entries):
+        """Add a batch of (level, message) entries to the output log with one insert."""
+        timestamp = datetime.now().strftime("%H:%M:%S")
+        first_line = int(self.output_text.index("end-1c").split(".")[0])
+        
+        self.output_text.insert(tk.END, "".join(f"[{timestamp}] {level.name}: {message}\n"
+                                                for level, message in entries))
+        self.output_text.see(tk.END)
+        
+        # Color coding: one tag range per run of same-level entries
+        # (a message may span several lines)
+        line = first_line
+        for level, group in groupby(entries, key=itemgetter(0)):
+            last_line = line - 1 + sum(message.count("\n") + 1 for _, message in group)
+            if level:
+                self.output_text.tag_add(_TAG[level], f"{line}.0", f"{last_line}.end")
+            line = last_line + 1
+            
+    def _trim_log(self):
+        """Drop the oldest lines once the output log grows past MAX_LINES."""
+        end_line = int(self.output_text.index("end-1c").split(".")[0])
+        if end_line > self.MAX_LINES:
+            self.output_text.delete("1.0", f"{end_line - self.MAX_LINES + self.TRIM_CHUNK}.0")
+        
+    def post(self, item):
+        """Queue an (action, data, level_or_None) update and wake the GUI thread."""
+        self.progress_queue.append(item)
+        self._wake()
+        
+    def _wake(self):
+        # One event per drain is enough; the handler picks up everything queued
+        if self._queue_event.is_set():
+            return
+        self._queue_event.set()
+        try:
+            self.root.event_generate("<<QueueUpdate>>", when="tail")
+        except (tk.TclError, RuntimeError):
+            # Window is going away; the fallback check covers anything left
+            self._queue_event.clear()
+            
+    def queue_log(self, message, level=Lvl.INFO):
+        """Buffer a log line from a worker thread; lines reach the GUI in batches."""
+        with self._log_lock:
+            self._log_buf.append((level, message))
+            if len(self._log_buf) >= 64 or time.monotonic() - self._log_last_flush > 0.05:
+                self._flush_log_locked()
+        # The drain also flushes the buffer, so lines below the threshold still show up
+        self._wake()
+                
+    def flush_log(self):
+        """Send any buffered worker log lines to the progress queue."""
+        with self._log_lock:
+            self._flush_log_locked()
+            
+    def _flush_log_locked(self):
+        if self._log_buf:
+            self.progress_queue.append(("log_batch", self._log_buf, None))
+            self._log_buf = []
+        self._log_last_flush = time.monotonic()
+        
+    def _on_path_change(self, *args):
+        """Keep the cached project path in sync with the entry."""
+        self._project_path_cached = self.project_path.get()
+        
     def select_project_folder(self):
         """Open folder selection dialog."""
-        folder = filedialog.askdirectory(initialdir=self.project_path.get())
+        folder = filedialog.askdirectory(initialdir=self._project_path_cached)
         if folder:
             self.project_path.set(folder)
             self.log_message(f"Selected project folder: {folder}")
             self.scan_project_files()
             
     def scan_project_files(self):
+        """Count project files in the background; the result arrives via the queue."""
+        self.file_count_label.config(text="Scanning...")
+        # A thread of its own, so the count never waits behind a running generation
+        threading.Thread(target=self._scan_worker, args=(self._project_path_cached,),
+                         daemon=True).start()
+        
+    def _scan_worker(self, path):
         """Scan and count project files."""
         try:
-            path = Path(self.project_path.get())
-            if not path.exists():
-                self.file_count_label.config(text="Invalid path")
+            if not os.path.exists(path):
+                self.post(("scan_result", "Invalid path", None))
                 return
                 
             # Quick scan for file count
-            code_extensions = {'.py', '.js', '.ts', '.jsx', '.tsx', '.java', '.cpp', '.c', '.h'}
-            count = 0
-            for file_path in path.rglob("*"):
-                if file_path.is_file() and file_path.suffix.lower() in code_extensions:
-                    count += 1
+            count = sum(1 for _ in _walk(path))
                     
-            self.file_count_label.config(text=f"{count} code files found")
+            self.post(("scan_result", f"{count} code files found", None))
         except Exception as e:
-            self.file_count_label.config(text="Error scanning files")
+            self.post(("scan_result", "Error scanning files", None))
             
     def test_model(self):
         """Test connection to LLM model."""
@@ -239,11 +466,11 @@ class RAGDocumentationGUI:
             try:
                 response = ask_llm("Hello, please respond with 'LLM connection successful'")
                 if response and "successful" in response.lower():
-                    self.progress_queue.put(("log", "LLM connection test successful!", "SUCCESS"))
+                    self.post(("log", "LLM connection test successful!", Lvl.SUCCESS))
                 else:
-                    self.progress_queue.put(("log", f"LLM responded: {response[:100]}...", "INFO"))
+                    self.post(("log", f"LLM responded: {response[:100]}...", Lvl.INFO))
             except Exception as e:
-                self.progress_queue.put(("log", f"LLM connection failed: {str(e)}", "ERROR"))
+                self.post(("log", f"LLM connection failed: {str(e)}", Lvl.ERROR))
                 
         threading.Thread(target=test_thread, daemon=True).start()
         
@@ -253,7 +480,7 @@ class RAGDocumentationGUI:
             return
             
         # Validate inputs
-        if not os.path.exists(self.project_path.get()):
+        if not os.path.exists(self._project_path_cached):
             messagebox.showerror("Error", "Please select a valid project folder")
             return
             
@@ -261,171 +488,223 @@ class RAGDocumentationGUI:
         self.generate_button.config(state="disabled")
         self.stop_button.config(state="normal")
         self.status_label.config(text="Generating documentation...")
+        self._last_progress = 0
         self.progress_var.set(0)
         
-        # Start generation thread
-        threading.Thread(target=self.generation_worker, daemon=True).start()
+        # Run generation on the worker thread
+        self._jobs.put(self.generation_worker)
+        
+    def _job_loop(self):
+        """Run queued jobs one at a time on the worker thread."""
+        while True:
+            job = self._jobs.get()
+            try:
+                job()
+            except Exception as e:
+                self.queue_log(f"Worker error: {str(e)}", Lvl.ERROR)
         
     def generation_worker(self):
         """Worker thread for documentation generation."""
         try:
             # Initialize RAG system
-            self.progress_queue.put(("log", "Initializing RAG system...", "INFO"))
-            self.progress_queue.put(("progress", 5))
-            
-            self.rag_system = CodebaseRAG(self.project_path.get())
+            self.queue_log("Initializing RAG system...", Lvl.INFO)
+            self.post(("progress", 5, None))
             
-            # Override the print function in RAG system to use our logging
-            original_print = print
-            def custom_print(*args, **kwargs):
-                message = " ".join(str(arg) for arg in args)
-                self.progress_queue.put(("log", message, "INFO"))
+            self.rag_system = CodebaseRAG(self._project_path_cached)
             
-            # Temporarily replace print
-            import builtins
-            builtins.print = custom_print
-            
-            try:
+            # Route the RAG system's print output into our log; closing the
+            # writers (innermost, so before the redirects end) flushes partial lines
+            stdout_writer = _QueueWriter(self)
+            stderr_writer = _QueueWriter(self, Lvl.ERROR)
+            with contextlib.redirect_stdout(stdout_writer), \
+                    contextlib.redirect_stderr(stderr_writer), \
+                    contextlib.closing(stdout_writer), contextlib.closing(stderr_writer):
                 # Step 1: Analyze codebase
-                self.progress_queue.put(("log", "Scanning and analyzing codebase...", "INFO"))
-                self.progress_queue.put(("progress", 10))
+                self.queue_log("Scanning and analyzing codebase...", Lvl.INFO)
+                self.post(("progress", 10, None))
                 
                 files = self.rag_system.scan_codebase()
-                self.progress_queue.put(("log", f"Found {len(files)} files to analyze", "INFO"))
+                self.queue_log(f"Found {len(files)} files to analyze", Lvl.INFO)
                 
                 # Analyze with progress updates
                 cache = self.rag_system.load_cache() if self.use_cache.get() else {}
                 analysis_results = {}
                 
                 total_files = len(files)
+                # Scanned paths all sit under the resolved root, so the relative
+                # path is a slice of the string rather than a Path.relative_to call
+                root_len = len(os.path.join(str(self.rag_system.root_path), ""))
                 for i, file_path in enumerate(files):
                     if not self.is_running:  # Check for stop signal
                         break
                         
                     result = self.rag_system.analyze_file(file_path, cache)
-                    relative_path = str(file_path.relative_to(Path(self.project_path.get())))
+                    relative_path = str(file_path)[root_len:]
                     analysis_results[relative_path] = result
                     
                     progress = 10 + (i + 1) / total_files * 60  # 10-70%
-                    self.progress_queue.put(("progress", progress))
-                    self.progress_queue.put(("log", f"Analyzed: {relative_path}", "INFO"))
+                    self.post(("progress", progress, None))
+                    self.queue_log(f"Analyzed: {relative_path}", Lvl.INFO)
                 
                 if not self.is_running:
                     return
                     
                 # Save cache
                 self.rag_system.save_cache(analysis_results)
-                self.progress_queue.put(("progress", 70))
+                self.post(("progress", 70, None))
                 
                 # Step 2: Generate README
                 if self.generate_readme.get():
-                    self.progress_queue.put(("log", "Generating README.md...", "INFO"))
+                    self.queue_log("Generating README.md...", Lvl.INFO)
                     readme_content = self.rag_system.generate_readme(analysis_results)
                     
-                    readme_file = Path(self.project_path.get()) / "README.md"
-                    with open(readme_file, 'w', encoding='utf-8') as f:
-                        f.write(readme_content)
-                    
-                    self.progress_queue.put(("log", f"Generated: {readme_file}", "SUCCESS"))
-                    self.progress_queue.put(("progress", 80))
+                    # None means the existing README is already up to date
+                    if readme_content is not None:
+                        readme_file = self.rag_system.write_readme(readme_content, analysis_results)
+                        self.queue_log(f"Generated: {readme_file}", Lvl.SUCCESS)
+                    self.post(("progress", 80, None))
                 
                 # Step 3: Generate component docs
                 if self.generate_components.get():
-                    self.progress_queue.put(("log", "Generating component documentation...", "INFO"))
+                    self.queue_log("Generating component documentation...", Lvl.INFO)
                     self.rag_system.generate_component_docs(analysis_results)
-                    self.progress_queue.put(("progress", 90))
+                    self.post(("progress", 90, None))
                 
                 # Step 4: Generate API docs
                 if self.generate_api.get():
-                    self.progress_queue.put(("log", "Generating API documentation...", "INFO"))
-                    api_files = [k for k, v in analysis_results.items()
-                               if 'api' in k.lower() or 'endpoint' in v.get('analysis', '').lower()]
+                    self.queue_log("Generating API documentation...", Lvl.INFO)
+                    api_files = [k for k, v in analysis_results.items() if v.get('has_api_keyword')]
                     
                     if api_files:
                         # Generate API documentation (simplified version)
                         api_docs = "# API Documentation\n\nGenerated from code analysis.\n"
-                        api_file = Path(self.project_path.get()) / "API_DOCUMENTATION.md"
-                        with open(api_file, 'w', encoding='utf-8') as f:
-                            f.write(api_docs)
-                        self.progress_queue.put(("log", f"Generated: {api_file}", "SUCCESS"))
-                
-                self.progress_queue.put(("progress", 100))
-                self.progress_queue.put(("log", "Documentation generation completed successfully! 🎉", "SUCCESS"))
-                self.progress_queue.put(("status", "Completed"))
+                        api_file = Path(self._project_path_cached) / "API_DOCUMENTATION.md"
+                        atomic_write(api_file, api_docs)
+                        self.queue_log(f"Generated: {api_file}", Lvl.SUCCESS)
                 
-            finally:
-                # Restore original print
-                builtins.print = original_print
+                self.post(("progress", 100, None))
+                self.queue_log("Documentation generation completed successfully! 🎉", Lvl.SUCCESS)
+                self.post(("status", "Completed", None))
                 
         except Exception as e:
-            self.progress_queue.put(("log", f"Error during generation: {str(e)}", "ERROR"))
-            self.progress_queue.put(("status", "Error"))
+            self.queue_log(f"Error during generation: {str(e)}", Lvl.ERROR)
+            self.post(("status", "Error", None))
         finally:
-            self.progress_queue.put(("finished", None))
+            # Release the cache database so Clear Cache can delete it
+            if self.rag_system is not None:
+                self.rag_system.close()
+                self.rag_system = None
+            self.flush_log()
+            self.post(("finished", None, None))
             
     def stop_generation(self):
         """Stop the generation process."""
         self.is_running = False
-        self.log_message("Stopping generation...", "INFO")
+        self.log_message("Stopping generation...", Lvl.INFO)
         
     def check_queue(self):
-        """Check the progress queue for updates from worker thread."""
+        """Fallback queue check in case a wakeup event was lost."""
+        self._drain_queue()
+        self.root.after(1000, self.check_queue)
+        
+    def _drain_queue(self):
+        """Apply all pending updates from worker threads."""
+        # Clear first so updates queued while draining trigger a new wakeup
+        self._queue_event.clear()
+        
+        # Only the last progress/status value of a drain is shown, so apply
+        # each at most once instead of once per queued event
+        latest_progress = None
+        latest_status = None
+        latest_scan = None
+        finished = False
+        logs = []
+        
         try:
+            # Pick up worker log lines still waiting in the buffer
+            self.flush_log()
             while True:
-                action, data, *extra = self.progress_queue.get_nowait()
+                action, data, level = self.progress_queue.popleft()
                 
-                if action == "log":
-                    level = extra[0] if extra else "INFO"
-                    self.log_message(data, level)
+                if action == "log_batch":
+                    logs.extend(data)
+                elif action == "log":
+                    logs.append((level, data))
                 elif action == "progress":
-                    self.progress_var.set(data)
+                    latest_progress = data
                 elif action == "status":
-                    self.status_label.config(text=data)
+                    latest_status = data
+                elif action == "scan_result":
+                    latest_scan = data
                 elif action == "finished":
-                    self.is_running = False
-                    self.generate_button.config(state="normal")
-                    self.stop_button.config(state="disabled")
-                    if self.progress_var.get() == 100:
-                        self.status_label.config(text="Generation completed successfully")
-                    else:
-                        self.status_label.config(text="Generation stopped")
+                    finished = True
                         
-        except queue.Empty:
+        except IndexError:
             pass
         finally:
-            # Schedule next check
-            self.root.after(100, self.check_queue)
+            if self._pending_clear:
+                self._pending_clear = False
+                self.output_text.delete("1.0", tk.END)
+            if logs:
+                self.log_messages(logs)
+                self._trim_log()
+            if latest_progress is not None:
+                self._last_progress = latest_progress
+                self.progress_var.set(latest_progress)
+            if latest_status is not None:
+                self.status_label.config(text=latest_status)
+            if latest_scan is not None:
+                self.file_count_label.config(text=latest_scan)
+            if finished:
+                self.is_running = False
+                self.generate_button.config(state="normal")
+                self.stop_button.config(state="disabled")
+                if self._last_progress >= 100:
+                    self.status_label.config(text="Generation completed successfully")
+                else:
+                    self.status_label.config(text="Generation stopped")
             
     def clear_cache(self):
         """Clear the analysis cache."""
+        # A generation still holds the cache database open until it finishes
+        if self.rag_system is not None:
+            self.log_message("Cannot clear the cache while a generation is running", Lvl.ERROR)
+            return
+            
+        cache_dir = os.path.join(self._project_path_cached, ".rag_cache")
         try:
-            cache_dir = Path(self.project_path.get()) / ".rag_cache"
-            if cache_dir.exists():
-                import shutil
-                shutil.rmtree(cache_dir)
-                self.log_message("Cache cleared successfully", "SUCCESS")
+            _fast_rmtree(cache_dir)
+            self.log_message("Cache cleared successfully", Lvl.SUCCESS)
+        except FileNotFoundError:
+            self.log_message("No cache found to clear", Lvl.INFO)
+        except OSError:
+            # Let shutil handle whatever the fast path could not remove
+            shutil.rmtree(cache_dir, ignore_errors=True)
+            if os.path.exists(cache_dir):
+                self.log_message("Error clearing cache: some files could not be removed", Lvl.ERROR)
             else:
-                self.log_message("No cache found to clear", "INFO")
-        except Exception as e:
-            self.log_message(f"Error clearing cache: {str(e)}", "ERROR")
+                self.log_message("Cache cleared successfully", Lvl.SUCCESS)
             
     def view_generated_files(self):
         """Show a dialog with generated files."""
-        project_path = Path(self.project_path.get())
-        generated_files = []
+        project_path = self._project_path_cached
+        
+        # One directory read instead of a stat per candidate file
+        try:
+            names = {name for name, is_dir in _listdir(project_path) if not is_dir}
+        except OSError:
+            names = set()
         
         # Check for common generated files
-        files_to_check = ["README.md", "API_DOCUMENTATION.md"]
-        for filename in files_to_check:
-            file_path = project_path / filename
-            if file_path.exists():
-                generated_files.append(filename)
+        generated_files = sorted(self.COMMON_DOCS & names)
                 
-        # Check docs directory
-        docs_dir = project_path / "docs"
-        if docs_dir.exists():
-            doc_files = list(docs_dir.glob("*.md"))
-            generated_files.extend([f"docs/{f.name}" for f in doc_files])
+        # Check docs directory; listing it doubles as the existence check
+        try:
+            docs_entries = _listdir(os.path.join(project_path, self.DOCS_SUBDIR))
+        except (FileNotFoundError, NotADirectoryError):
+            docs_entries = ()
+        generated_files.extend(f"{self.DOCS_SUBDIR}/{name}" for name, is_dir in docs_entries
+                               if not is_dir and name.endswith(".md"))
             
         if generated_files:
             files_text = "\n".join(generated_files)
@@ -435,24 +714,24 @@ class RAGDocumentationGUI:
             
     def open_output_folder(self):
         """Open the project folder in file explorer."""
-        import subprocess
-        import platform
-        
-        path = self.project_path.get()
+        path = self._project_path_cached
         
         try:
-            if platform.system() == "Windows":
+            # Popen so the GUI thread does not wait on the file manager
+            if _PLATFORM == "Windows":
                 os.startfile(path)
-            elif platform.system() == "Darwin":  # macOS
-                subprocess.run(["open", path])
+            elif _PLATFORM == "Darwin":  # macOS
+                subprocess.Popen(["open", path])
             else:  # Linux
-                subprocess.run(["xdg-open", path])
+                subprocess.Popen(["xdg-open", path])
         except Exception as e:
-            self.log_message(f"Could not open folder: {str(e)}", "ERROR")
+            self.log_message(f"Could not open folder: {str(e)}", Lvl.ERROR)
             
     def clear_log(self):
-        """Clear the output log."""
-        self.output_text.delete(1.0, tk.END)
+        """Clear the output log on the next queue drain."""
+        # Deferred so the clear and any pending inserts redraw the widget once
+        self._pending_clear = True
+        self._wake()
         
     def show_about(self):
         """Show about dialog."""
@@ -476,7 +755,8 @@ Built with Python, Tkinter, and your local LLM."""
         
     def run(self):
         """Start the GUI application."""
-        # Initial scan of current directory
+        # Initial scan of current directory; runs in the background so the
+        # window appears before a large tree has been walked
         self.scan_project_files()
         self.log_message("RAG Documentation Generator started")
         self.log_message(f"Current model: {self.current_model.get()}")